@@ -0,0 +1,90 @@
+# cython: language_level=3
+# Optional compiled accelerator for `libstackvm.py`. Exposes the hot stack and
+# register entry points of the shared library as direct C calls, with the
+# same names and argument order as their ctypes counterparts. The virtual
+# machine handle is passed as a plain integer address.
+from libc.stdint cimport uint8_t, int32_t, uintptr_t
+
+cdef extern from *:
+    """
+    #include <stddef.h>
+    #include <stdint.h>
+
+    size_t stackvm_stack_get_len(void *vm);
+    void stackvm_stack_store_int(void *vm, size_t index, int32_t value);
+    void stackvm_stack_store_float(void *vm, size_t index, double value);
+    void stackvm_stack_store_address(void *vm, size_t index, uint8_t kind, size_t value);
+    void stackvm_stack_push_int(void *vm, int32_t value);
+    void stackvm_stack_push_float(void *vm, double value);
+    void stackvm_stack_push_address(void *vm, uint8_t kind, size_t value);
+
+    size_t stackvm_registers_get_frame_pointer(void *vm);
+    void stackvm_registers_set_frame_pointer(void *vm, size_t value);
+    size_t stackvm_registers_get_global_pointer(void *vm);
+    void stackvm_registers_set_global_pointer(void *vm, size_t value);
+    size_t stackvm_registers_get_code_pointer(void *vm);
+    void stackvm_registers_set_code_pointer(void *vm, size_t value);
+    size_t stackvm_registers_get_stack_pointer(void *vm);
+    void stackvm_registers_set_stack_pointer(void *vm, size_t value);
+    """
+    size_t c_stack_get_len "stackvm_stack_get_len" (void *vm)
+    void c_stack_store_int "stackvm_stack_store_int" (void *vm, size_t index, int32_t value)
+    void c_stack_store_float "stackvm_stack_store_float" (void *vm, size_t index, double value)
+    void c_stack_store_address "stackvm_stack_store_address" (void *vm, size_t index, uint8_t kind, size_t value)
+    void c_stack_push_int "stackvm_stack_push_int" (void *vm, int32_t value)
+    void c_stack_push_float "stackvm_stack_push_float" (void *vm, double value)
+    void c_stack_push_address "stackvm_stack_push_address" (void *vm, uint8_t kind, size_t value)
+
+    size_t c_registers_get_frame_pointer "stackvm_registers_get_frame_pointer" (void *vm)
+    void c_registers_set_frame_pointer "stackvm_registers_set_frame_pointer" (void *vm, size_t value)
+    size_t c_registers_get_global_pointer "stackvm_registers_get_global_pointer" (void *vm)
+    void c_registers_set_global_pointer "stackvm_registers_set_global_pointer" (void *vm, size_t value)
+    size_t c_registers_get_code_pointer "stackvm_registers_get_code_pointer" (void *vm)
+    void c_registers_set_code_pointer "stackvm_registers_set_code_pointer" (void *vm, size_t value)
+    size_t c_registers_get_stack_pointer "stackvm_registers_get_stack_pointer" (void *vm)
+    void c_registers_set_stack_pointer "stackvm_registers_set_stack_pointer" (void *vm, size_t value)
+
+cpdef size_t stackvm_stack_get_len (uintptr_t vm):
+    return c_stack_get_len(<void *> vm)
+
+cpdef stackvm_stack_store_int (uintptr_t vm, size_t index, int32_t value):
+    c_stack_store_int(<void *> vm, index, value)
+
+cpdef stackvm_stack_store_float (uintptr_t vm, size_t index, double value):
+    c_stack_store_float(<void *> vm, index, value)
+
+cpdef stackvm_stack_store_address (uintptr_t vm, size_t index, uint8_t kind, size_t value):
+    c_stack_store_address(<void *> vm, index, kind, value)
+
+cpdef stackvm_stack_push_int (uintptr_t vm, int32_t value):
+    c_stack_push_int(<void *> vm, value)
+
+cpdef stackvm_stack_push_float (uintptr_t vm, double value):
+    c_stack_push_float(<void *> vm, value)
+
+cpdef stackvm_stack_push_address (uintptr_t vm, uint8_t kind, size_t value):
+    c_stack_push_address(<void *> vm, kind, value)
+
+cpdef size_t stackvm_registers_get_frame_pointer (uintptr_t vm):
+    return c_registers_get_frame_pointer(<void *> vm)
+
+cpdef stackvm_registers_set_frame_pointer (uintptr_t vm, size_t value):
+    c_registers_set_frame_pointer(<void *> vm, value)
+
+cpdef size_t stackvm_registers_get_global_pointer (uintptr_t vm):
+    return c_registers_get_global_pointer(<void *> vm)
+
+cpdef stackvm_registers_set_global_pointer (uintptr_t vm, size_t value):
+    c_registers_set_global_pointer(<void *> vm, value)
+
+cpdef size_t stackvm_registers_get_code_pointer (uintptr_t vm):
+    return c_registers_get_code_pointer(<void *> vm)
+
+cpdef stackvm_registers_set_code_pointer (uintptr_t vm, size_t value):
+    c_registers_set_code_pointer(<void *> vm, value)
+
+cpdef size_t stackvm_registers_get_stack_pointer (uintptr_t vm):
+    return c_registers_get_stack_pointer(<void *> vm)
+
+cpdef stackvm_registers_set_stack_pointer (uintptr_t vm, size_t value):
+    c_registers_set_stack_pointer(<void *> vm, value)
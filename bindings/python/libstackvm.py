@@ -1,8 +1,28 @@
 from ctypes import *
-import atexit
+from collections import namedtuple
+from pathlib import Path
 import enum
+import operator
+import sys
+import threading
+import weakref
 
-lib = cdll.LoadLibrary("libstackvm.dll")
+# Name of the shared library produced by `zig build` on each platform. It is
+# expected to sit next to this file
+lib_name = { "win32": "libstackvm.dll", "darwin": "liblibstackvm.dylib" }.get(sys.platform, "liblibstackvm.so")
+
+lib = CDLL(str(Path(__file__).with_name(lib_name)), mode = RTLD_LOCAL)
+
+# Optional compiled accelerator (see `setup.py`). When it is available, the hot
+# stack and register calls skip the ctypes argument marshalling entirely. Only
+# a missing module falls back to ctypes: a module that is present but fails to
+# load (e.g. cannot find the shared library) is reported
+try:
+    import _libstackvm as native
+except ModuleNotFoundError:
+    native = None
+
+hot = native or lib
 
 def declare( f, args, res ):
     f.argtypes = args
@@ -10,11 +30,19 @@ def declare( f, args, res ):
 
     return f
 
-declare( lib.stackvm_allocator_init, [], c_void_p )
-declare( lib.stackvm_allocator_deinit, [c_void_p], None )
+# Ties the release of a library-owned resource to the lifetime of `obj`: it is
+# freed when `obj` is garbage collected, or earlier through an explicit call
+# to the returned finalizer (e.g. from `deinit`), whichever comes first
+def own( obj, release, *args ):
+    return weakref.finalize(obj, release, *args)
 
-global_allocator = lib.stackvm_allocator_init()
-atexit.register(lambda: lib.stackvm_allocator_deinit(global_allocator))
+# Decodes a string returned by the library as a raw pointer plus its length.
+# Reading exactly `length` bytes avoids the strlen that `c_char_p` would do
+def read_string( ptr, length ):
+    if length > 0:
+        return string_at(ptr, length).decode()
+
+    return None
 
 class TextPosition(Structure):
     _fields_ = [('line', c_uint32),
@@ -23,10 +51,7 @@ class TextPosition(Structure):
 
     @staticmethod
     def init ( line = 0, column = 0, offset = 0 ):
-        return lib.stackvm_textposition_init(line, column, offset)
-
-declare( lib.stackvm_textposition_init, [c_uint32, c_uint32, c_uint32], TextPosition )
-declare( lib.stackvm_textposition_init_empty, [], TextPosition )
+        return TextPosition(line, column, offset)
 
 class InstructionSpan(Structure):
     _fields_ = [('instruction', c_size_t),
@@ -35,97 +60,188 @@ class InstructionSpan(Structure):
     
     @staticmethod
     def init ( instruction = 0, start = None, end = None ):
-        return lib.stackvm_instructionspan_init(
+        return InstructionSpan(
             instruction, 
-            start or TextPosition.init(), 
-            end or TextPosition.init()
+            start or TextPosition(), 
+            end or TextPosition()
         )
 
-declare( lib.stackvm_instructionspan_init, [c_size_t, TextPosition, TextPosition], InstructionSpan )
-declare( lib.stackvm_instructionspan_init_empty, [], InstructionSpan )
+class SourceSpan(namedtuple('SourceSpan', ['instruction', 
+                                           'start_line', 'start_column', 'start_offset', 
+                                           'end_line', 'end_column', 'end_offset'])):
+    __slots__ = ()
+
+    @property
+    def start (self):
+        return TextPosition(self.start_line, self.start_column, self.start_offset)
+
+    @property
+    def end (self):
+        return TextPosition(self.end_line, self.end_column, self.end_offset)
 
 class RedBlackTree_InstructionSpan(Structure):
     _fields_ = [('allocator', c_void_p),
                 ('len', c_uint32),
                 ('root', c_void_p)]
 
+FIND_CACHE_SIZE = 4096
+
 class SourceMap(Structure):
     _fields_ = [('instructions_positions', RedBlackTree_InstructionSpan),
                 ('current_position', TextPosition),
                 ('current_instruction', c_size_t)]
 
+    # Structures returned from the library never run __init__, so the scratch
+    # span and the lookup cache are created on first use. Only source maps
+    # created by `init` or `move` own their tree and have a finalizer; the
+    # ones returned by `Parser.get_source_map` are borrowed from the parser
+    _span_scratch = None
+    _find_cache = None
+    _finalizer = None
+    # Borrowed maps keep the Parser that owns their tree alive
+    _parser = None
+
     @staticmethod
     def init ():
-        return lib.stackvm_sourcemap_init(global_allocator)
+        declare_group( "sourcemap" )
+
+        return SourceMap._owned(lib.stackvm_sourcemap_init(global_allocator))
+
+    @staticmethod
+    def _owned (source_map):
+        # The finalizer gets a copy, since it cannot hold a reference to the
+        # object it is watching
+        source_map._finalizer = own(source_map, lib.stackvm_sourcemap_deinit, SourceMap.from_buffer_copy(source_map))
+
+        return source_map
     
     def deinit (self):
-        return lib.stackvm_sourcemap_deinit(self)
+        self._find_cache = None
 
+        if self._finalizer is not None:
+            self._finalizer()
+        else:
+            lib.stackvm_sourcemap_deinit(self)
+
+    # Results are memoized in a plain dict, which (unlike a cache wrapping a
+    # bound method) does not keep the source map alive through a cycle. It is
+    # emptied once it reaches FIND_CACHE_SIZE entries
     def find (self, bytecode_pos):
-        result = InstructionSpan.init()
+        cache = self._find_cache
+
+        if cache is None:
+            cache = self._find_cache = {}
+
+        try:
+            return cache[bytecode_pos]
+        except KeyError:
+            pass
+
+        if len(cache) >= FIND_CACHE_SIZE:
+            cache.clear()
+
+        result = cache[bytecode_pos] = self._find_uncached(bytecode_pos)
+
+        return result
+
+    def _find_uncached (self, bytecode_pos):
+        result = self._span_scratch
+
+        if result is None:
+            result = self._span_scratch = InstructionSpan()
 
-        if lib.stackvm_sourcemap_find(self, bytecode_pos, result):
-            return result
+        if _sourcemap_find(self, bytecode_pos, result):
+            start, end = result.start, result.end
+
+            return SourceSpan(result.instruction, 
+                              start.line, start.column, start.offset, 
+                              end.line, end.column, end.offset)
         
         return None
     
     def move (self):
-        return lib.stackvm_sourcemap_move(self)
+        self._find_cache = None
+
+        moved = lib.stackvm_sourcemap_move(self)
+
+        # The tree now belongs to the returned source map, but only if it was
+        # ours to give: moving a map borrowed from a Parser leaves the tree
+        # owned by the parser
+        if self._finalizer is not None:
+            self._finalizer.detach()
+
+            return SourceMap._owned(moved)
 
-declare( lib.stackvm_sourcemap_init, [c_void_p], SourceMap )
-declare( lib.stackvm_sourcemap_deinit, [POINTER(SourceMap)], None )
-declare( lib.stackvm_sourcemap_find, [POINTER(SourceMap), c_size_t, POINTER(InstructionSpan)], c_int )
-declare( lib.stackvm_sourcemap_move, [POINTER(SourceMap)], SourceMap )
+        moved._parser = self._parser
+
+        return moved
 
 class Parser(Structure):
     _fields_ = [('parser', c_void_p),
                 ('source', POINTER(c_ubyte)),
                 ('source_len', c_size_t)]
     
+    # Accepts either a string or the already encoded bytes/bytearray. The
+    # library keeps its own copy of the source, so the buffer is not retained
     @staticmethod
     def init (source):
-        buffer = source.encode()
+        if isinstance(source, bytes):
+            buffer = source
+        elif isinstance(source, bytearray):
+            buffer = (c_char * len(source)).from_buffer(source)
+        else:
+            buffer = source.encode()
+
+        # Parsers hand out source maps as well
+        declare_group( "parser" )
+        declare_group( "sourcemap" )
 
-        return lib.stackvm_parser_init(global_allocator, buffer, len(buffer))
+        parser = lib.stackvm_parser_init(global_allocator, buffer, len(buffer))
+
+        parser._finalizer = own(parser, lib.stackvm_parser_deinit, Parser.from_buffer_copy(parser))
+
+        return parser
     
     def deinit (self):
-        lib.stackvm_parser_deinit(self)
+        self._finalizer()
     
+    # Output slot for the length of the strings returned by the library. Parser
+    # instances are created by ctypes without running __init__, so it is
+    # allocated on first use and then reused
+    _len_slot = None
+    _len_ref = None
+
+    def _get_len_ref (self):
+        if self._len_ref is None:
+            self._len_slot = c_size_t(0)
+            self._len_ref = byref(self._len_slot)
+
+        return self._len_ref
+
     def get_position (self):
         return lib.stackvm_parser_get_position(self)
 
     def get_source_map (self):
-        return lib.stackvm_parser_get_source_map(self)
+        source_map = lib.stackvm_parser_get_source_map(self)
 
-    def get_err_message (self):
-        err_len = c_size_t(1)
+        source_map._parser = self
 
-        err_ptr = lib.stackvm_parser_get_err_message(self, pointer(err_len))
+        return source_map
 
-        if err_len.value > 0:
-            return create_string_buffer(err_ptr, err_len.value).value.decode()
-        
-        return None
+    def get_err_message (self):
+        err_ptr = lib.stackvm_parser_get_err_message(self, self._get_len_ref())
 
-    def get_current_line (self):
-        err_len = c_size_t(1)
+        return read_string(err_ptr, self._len_slot.value)
 
-        err_ptr = lib.stackvm_parser_get_current_line(self, pointer(err_len))
+    def get_current_line (self):
+        err_ptr = lib.stackvm_parser_get_current_line(self, self._get_len_ref())
 
-        if err_len.value > 0:
-            return create_string_buffer(err_ptr, err_len.value).value.decode()
-        
-        return None
+        return read_string(err_ptr, self._len_slot.value)
 
     def get_source_span (self, start, end):
-        err_len = c_size_t(1)
-
-        err_ptr = lib.stackvm_parser_get_source_span(self, start, end, pointer(err_len))
+        err_ptr = lib.stackvm_parser_get_source_span(self, start, end, self._get_len_ref())
 
-        if err_len.value > 0:
-            return create_string_buffer(err_ptr, err_len.value).value.decode()
-        
-        return None
+        return read_string(err_ptr, self._len_slot.value)
 
     def parse (self):
         addr = lib.stackvm_parser_parse(self)
@@ -138,44 +254,59 @@ class Parser(Structure):
 
         return Reader( addr )
 
-declare( lib.stackvm_parser_init, [c_void_p, c_char_p, c_size_t], Parser )
-declare( lib.stackvm_parser_deinit, [POINTER(Parser)], None )
-declare( lib.stackvm_parser_get_position, [POINTER(Parser)], TextPosition )
-declare( lib.stackvm_parser_get_source_map, [POINTER(Parser)], SourceMap )
-declare( lib.stackvm_parser_get_err_message, [POINTER(Parser), POINTER(c_size_t)], c_char_p )
-declare( lib.stackvm_parser_get_current_line, [POINTER(Parser), POINTER(c_size_t)], c_char_p )
-declare( lib.stackvm_parser_get_source_span, [POINTER(Parser), TextPosition, TextPosition, POINTER(c_size_t)], c_char_p )
-declare( lib.stackvm_parser_parse, [POINTER(Parser)], c_void_p )
-
 class Reader:
+    __slots__ = ('ptr', '_finalizer', '__weakref__')
+
     def __init__ ( self, ptr ):
-        self.ptr = cast(ptr, POINTER(c_void_p))
+        declare_group( "reader" )
+
+        self.ptr = ptr
+        self._finalizer = own(self, lib.stackvm_reader_deinit, ptr)
     
     def __len__ ( self ):
         return lib.stackvm_reader_get_len(self.ptr)
 
     def deinit (self):
-        lib.stackvm_reader_deinit(self.ptr)
+        self._finalizer()
 
+    # Frees only the reader, not the bytecode it points to
     def destroy (self):
-        lib.stackvm_reader_destroy(global_allocator, self.ptr)
+        if self._finalizer.detach() is not None:
+            lib.stackvm_reader_destroy(global_allocator, self.ptr)
 
-declare( lib.stackvm_reader_deinit, [c_void_p], None )
-declare( lib.stackvm_reader_destroy, [c_void_p, c_void_p], None )
-declare( lib.stackvm_reader_get_len, [c_void_p], c_size_t )
+    # Called once a VirtualMachine has taken ownership of the bytecode: from
+    # then on only the reader itself is left to free
+    def _disown (self):
+        if self._finalizer.detach() is not None:
+            self._finalizer = own(self, lib.stackvm_reader_destroy, global_allocator, self.ptr)
 
 class VirtualMachine:
+    __slots__ = ('ptr', 'registers', 'stack', '_len_slot', '_len_ref', '_finalizer', '__weakref__')
+
     @staticmethod
     def init(reader):
-        return VirtualMachine(lib.stackvm_init(global_allocator, reader.ptr))
+        # stackvm_init runs before __init__, which declares the group as well
+        declare_group( "vm" )
+
+        vm = VirtualMachine(lib.stackvm_init(global_allocator, reader.ptr))
+
+        reader._disown()
+
+        return vm
 
     def __init__ ( self, ptr ):
-        self.ptr = cast(ptr, POINTER(c_void_p))
+        declare_group( "vm" )
+
+        self.ptr = ptr
         self.registers = Registers(self)
         self.stack = Stack(self)
+        # Output slot for the length of the error message, reused across calls
+        self._len_slot = c_size_t(0)
+        self._len_ref = byref(self._len_slot)
+        self._finalizer = own(self, lib.stackvm_deinit, ptr)
     
     def deinit (self):
-        lib.stackvm_deinit(self.ptr)
+        self._finalizer()
 
     @property
     def last_instruction (self):
@@ -183,14 +314,9 @@ class VirtualMachine:
 
     @property
     def err_message (self):
-        err_len = c_size_t(1)
+        err_ptr = lib.stackvm_get_err_message(self.ptr, self._len_ref)
 
-        err_ptr = lib.stackvm_get_err_message(self.ptr, pointer(err_len))
-
-        if err_len.value > 0:
-            return create_string_buffer(err_ptr, err_len.value).value.decode()
-        
-        return None
+        return read_string(err_ptr, self._len_slot.value)
 
     def execute (self):
         success = lib.stackvm_execute(self.ptr)
@@ -198,56 +324,38 @@ class VirtualMachine:
         if not success:
             raise Exception(self.err_message)
 
-declare( lib.stackvm_init, [c_void_p], c_void_p )
-declare( lib.stackvm_deinit, [c_void_p], None )
-declare( lib.stackvm_execute, [c_void_p], c_bool )
-declare( lib.stackvm_get_last_instruction, [c_void_p], c_size_t )
-declare( lib.stackvm_get_err_message, [c_void_p, POINTER(c_size_t)], c_char_p )
+    # Runs at most `steps` instructions in a single call into the library
+    def execute_n (self, steps):
+        success = lib.stackvm_execute_n(self.ptr, steps)
 
-class Registers:
-    def __init__ (self, vm):
-        self.vm = vm
-    
-    @property
-    def frame_pointer (self):
-        return lib.stackvm_registers_get_frame_pointer(self.vm.ptr)
+        if not success:
+            raise Exception(self.err_message)
 
-    @frame_pointer.setter
-    def frame_pointer (self, value):
-        lib.stackvm_registers_set_frame_pointer(self.vm.ptr, value)
-    
-    @property
-    def global_pointer (self):
-        return lib.stackvm_registers_get_global_pointer(self.vm.ptr)
+    # Runs until the code pointer reaches `code_pointer` or the program ends
+    def execute_until (self, code_pointer):
+        success = lib.stackvm_execute_until(self.ptr, code_pointer)
 
-    @global_pointer.setter
-    def global_pointer (self, value):
-        lib.stackvm_registers_set_global_pointer(self.vm.ptr, value)
-    
-    @property
-    def code_pointer (self):
-        return lib.stackvm_registers_get_code_pointer(self.vm.ptr)
+        if not success:
+            raise Exception(self.err_message)
 
-    @code_pointer.setter
-    def code_pointer (self, value):
-        lib.stackvm_registers_set_code_pointer(self.vm.ptr, value)
-    
     @property
-    def stack_pointer (self):
-        return lib.stackvm_registers_get_stack_pointer(self.vm.ptr)
-
-    @stack_pointer.setter
-    def stack_pointer (self, value):
-        lib.stackvm_registers_set_stack_pointer(self.vm.ptr, value)
-
-declare( lib.stackvm_registers_get_frame_pointer, [c_void_p], c_size_t )
-declare( lib.stackvm_registers_set_frame_pointer, [c_void_p, c_size_t], None )
-declare( lib.stackvm_registers_get_global_pointer, [c_void_p], c_size_t )
-declare( lib.stackvm_registers_set_global_pointer, [c_void_p, c_size_t], None )
-declare( lib.stackvm_registers_get_code_pointer, [c_void_p], c_size_t )
-declare( lib.stackvm_registers_set_code_pointer, [c_void_p, c_size_t], None )
-declare( lib.stackvm_registers_get_stack_pointer, [c_void_p], c_size_t )
-declare( lib.stackvm_registers_set_stack_pointer, [c_void_p, c_size_t], None )
+    def halted (self):
+        return lib.stackvm_is_halted(self.ptr)
+
+class Registers:
+    __slots__ = ('vm', '_vmptr')
+
+    def __init__ (self, vm):
+        declare_group( "registers" )
+
+        # Keeps the VirtualMachine alive for as long as its registers are
+        # reachable; the handle is cached next to it for the hot paths
+        self.vm = vm
+        self._vmptr = vm.ptr
+
+    # frame_pointer, global_pointer, code_pointer and stack_pointer are plain
+    # properties, generated by `bind_registers` when the "registers" group is
+    # declared
 
 class ValueType(enum.IntEnum):
     NONE = 0
@@ -269,66 +377,292 @@ class Value(Structure):
     
     @staticmethod
     def init (type, value):
+        init = _VALUE_INIT_TABLE.get(type)
+
+        if init is not None:
+            return init(value)
+
         if type == ValueType.NONE:
             raise Exception("Cannot create value of type NONE")
-        elif type == ValueType.INTEGER:
-            return lib.stackvm_value_int(value)
-        elif type == ValueType.FLOAT:
-            return lib.stackvm_value_float(value)
-        else:
-            return lib.stackvm_value_size(type, value)
+
+        return lib.stackvm_value_size(type, value)
 
     @property
     def value (self):
-        if ValueType.INTEGER == self.kind:
-            return self._value.integer
-        elif ValueType.FLOAT == self.kind:
-            return self._value.float
-        else:
-            return self._value.size
+        return _VALUE_ACCESSORS.get(self.kind, _size_getter)(self._value)
+
+# Value kinds with a dedicated union field and constructor/push/store function.
+# Every other kind is an address, handled by `size` and the `*_size`/`*_address`
+# variants
+_VALUE_INIT_TABLE = {
+    int(ValueType.INTEGER): lib.stackvm_value_int,
+    int(ValueType.FLOAT): lib.stackvm_value_float,
+}
+
+_VALUE_ACCESSORS = {
+    int(ValueType.INTEGER): operator.attrgetter('integer'),
+    int(ValueType.FLOAT): operator.attrgetter('float'),
+}
+
+_size_getter = operator.attrgetter('size')
 
-declare( lib.stackvm_value_int, [c_int32], Value )
-declare( lib.stackvm_value_float, [c_double], Value )
-declare( lib.stackvm_value_size, [c_uint8, c_size_t], Value )
+# Filled in by `bind_stack`, when the "stack" group is declared
+_PUSH_TABLE = {}
+_STORE_TABLE = {}
 
 class Stack:
+    __slots__ = ('vm', '_vmptr', '_value_scratch')
+
     def __init__ ( self, vm ):
+        declare_group( "stack" )
+
+        # See Registers
         self.vm = vm
+        self._vmptr = vm.ptr
+        # Reused by `load_value` and `pop_value`, which only hand out the
+        # Python value and never the Structure itself
+        self._value_scratch = Value()
     
     def __len__ (self):
-        return lib.stackvm_stack_get_len(self.vm.ptr)
+        return _stack_get_len(self._vmptr)
 
-    def load (self, index):
-        return lib.stackvm_stack_load(self.vm.ptr, index)
+    # When `out` is given, the value is written into it instead of a new Value
+    def load (self, index, out = None):
+        value = out if out is not None else Value()
 
-    def store (self, index, value):
-        lib.stackvm_stack_store(self.vm.ptr, index, value)
+        _stack_load_into(self._vmptr, index, value)
+
+        return value
+
+    def load_value (self, index):
+        _stack_load_into(self._vmptr, index, self._value_scratch)
+
+        return self._value_scratch.value
 
     def store (self, index, value):
-        if value.kind == ValueType.INTEGER:
-            lib.stackvm_stack_store_int(self.vm.ptr, index, value.value)
-        elif value.kind == ValueType.FLOAT:
-            lib.stackvm_stack_store_float(self.vm.ptr, index, value.value)
+        store = _STORE_TABLE.get(value.kind)
+
+        if store is not None:
+            store(self._vmptr, index, value.value)
         else:
-            lib.stackvm_stack_store_address(self.vm.ptr, index, value.kind, value.value)
+            _stack_store_address(self._vmptr, index, value.kind, value.value)
 
     def push (self, value):
-        if value.kind == ValueType.INTEGER:
-            lib.stackvm_stack_push_int(self.vm.ptr, value.value)
-        elif value.kind == ValueType.FLOAT:
-            lib.stackvm_stack_push_float(self.vm.ptr, value.value)
+        push = _PUSH_TABLE.get(value.kind)
+
+        if push is not None:
+            push(self._vmptr, value.value)
         else:
-            lib.stackvm_stack_push_address(self.vm.ptr, value.kind, value.value)
-
-    def pop (self):
-        return lib.stackvm_stack_pop(self.vm.ptr)
-
-declare( lib.stackvm_stack_get_len, [c_void_p], c_size_t )
-declare( lib.stackvm_stack_load, [c_void_p, c_size_t], Value )
-declare( lib.stackvm_stack_store_int, [c_void_p, c_size_t, c_int32], None )
-declare( lib.stackvm_stack_store_float, [c_void_p, c_size_t, c_double], None )
-declare( lib.stackvm_stack_store_address, [c_void_p, c_size_t, c_uint8, c_size_t], None )
-declare( lib.stackvm_stack_push_int, [c_void_p, c_int32], None )
-declare( lib.stackvm_stack_push_float, [c_void_p, c_double], None )
-declare( lib.stackvm_stack_push_address, [c_void_p, c_uint8, c_size_t], None )
-declare( lib.stackvm_stack_pop, [c_void_p], Value )
+            _stack_push_address(self._vmptr, value.kind, value.value)
+
+    def pop (self, out = None):
+        value = out if out is not None else Value()
+
+        _stack_pop_into(self._vmptr, value)
+
+        return value
+
+    def pop_value (self):
+        _stack_pop_into(self._vmptr, self._value_scratch)
+
+        return self._value_scratch.value
+
+    def push_many (self, values):
+        values = list(values)
+        buffer = (Value * len(values))(*values)
+
+        lib.stackvm_stack_push_many(self._vmptr, buffer, len(buffer))
+
+    def pop_many (self, n):
+        buffer = (Value * n)()
+
+        popped = lib.stackvm_stack_pop_many(self._vmptr, buffer, n)
+
+        return buffer[:popped]
+
+    def load_range (self, start, n):
+        buffer = (Value * n)()
+
+        loaded = lib.stackvm_stack_load_range(self._vmptr, start, buffer, n)
+
+        return buffer[:loaded]
+
+    # Copies the whole stack into a NumPy structured array (NumPy is only
+    # imported when this is called). `integer`, `float` and `size` overlap,
+    # like the fields of ValueUnion, so they should be filtered by `kind`:
+    #   arr['float'][arr['kind'] == ValueType.FLOAT]
+    def snapshot_np (self):
+        import numpy
+
+        offset = Value._value.offset
+
+        dtype = numpy.dtype({
+            'names': ['kind', 'integer', 'float', 'size'],
+            'formats': [numpy.uint8, numpy.int32, numpy.float64, numpy.uintp],
+            'offsets': [0, offset, offset, offset],
+            'itemsize': sizeof(Value),
+        })
+
+        n = len(self)
+        arr = numpy.empty(n, dtype = dtype)
+
+        loaded = lib.stackvm_stack_load_range(self._vmptr, 0, arr.ctypes.data_as(POINTER(Value)), n)
+
+        return arr[:loaded]
+
+# Every function exported by the shared library, as (name, argtypes, restype),
+# grouped by the object that uses them. Each group is only looked up in the
+# library and bound the first time one of those objects is created (see
+# `declare_group`), together with the hot-path tables that use it
+DECLS = {
+    "allocator": [
+        ( "stackvm_allocator_init", [], c_void_p ),
+        ( "stackvm_allocator_deinit", [c_void_p], None ),
+    ],
+
+    "sourcemap": [
+        ( "stackvm_sourcemap_init", [c_void_p], SourceMap ),
+        ( "stackvm_sourcemap_deinit", [POINTER(SourceMap)], None ),
+        ( "stackvm_sourcemap_find", [POINTER(SourceMap), c_size_t, POINTER(InstructionSpan)], c_int ),
+        ( "stackvm_sourcemap_move", [POINTER(SourceMap)], SourceMap ),
+    ],
+
+    "parser": [
+        ( "stackvm_parser_init", [c_void_p, c_char_p, c_size_t], Parser ),
+        ( "stackvm_parser_deinit", [POINTER(Parser)], None ),
+        ( "stackvm_parser_get_position", [POINTER(Parser)], TextPosition ),
+        ( "stackvm_parser_get_source_map", [POINTER(Parser)], SourceMap ),
+        ( "stackvm_parser_get_err_message", [POINTER(Parser), POINTER(c_size_t)], c_void_p ),
+        ( "stackvm_parser_get_current_line", [POINTER(Parser), POINTER(c_size_t)], c_void_p ),
+        ( "stackvm_parser_get_source_span", [POINTER(Parser), TextPosition, TextPosition, POINTER(c_size_t)], c_void_p ),
+        ( "stackvm_parser_parse", [POINTER(Parser)], c_void_p ),
+    ],
+
+    "reader": [
+        ( "stackvm_reader_deinit", [c_void_p], None ),
+        ( "stackvm_reader_destroy", [c_void_p, c_void_p], None ),
+        ( "stackvm_reader_get_len", [c_void_p], c_size_t ),
+    ],
+
+    "vm": [
+        ( "stackvm_init", [c_void_p, c_void_p], c_void_p ),
+        ( "stackvm_deinit", [c_void_p], None ),
+        ( "stackvm_execute", [c_void_p], c_bool ),
+        ( "stackvm_execute_n", [c_void_p, c_size_t], c_bool ),
+        ( "stackvm_execute_until", [c_void_p, c_size_t], c_bool ),
+        ( "stackvm_is_halted", [c_void_p], c_bool ),
+        ( "stackvm_get_last_instruction", [c_void_p], c_size_t ),
+        ( "stackvm_get_err_message", [c_void_p, POINTER(c_size_t)], c_void_p ),
+    ],
+
+    "registers": [
+        ( "stackvm_registers_get_frame_pointer", [c_void_p], c_size_t ),
+        ( "stackvm_registers_set_frame_pointer", [c_void_p, c_size_t], None ),
+        ( "stackvm_registers_get_global_pointer", [c_void_p], c_size_t ),
+        ( "stackvm_registers_set_global_pointer", [c_void_p, c_size_t], None ),
+        ( "stackvm_registers_get_code_pointer", [c_void_p], c_size_t ),
+        ( "stackvm_registers_set_code_pointer", [c_void_p, c_size_t], None ),
+        ( "stackvm_registers_get_stack_pointer", [c_void_p], c_size_t ),
+        ( "stackvm_registers_set_stack_pointer", [c_void_p, c_size_t], None ),
+    ],
+
+    "value": [
+        ( "stackvm_value_int", [c_int32], Value ),
+        ( "stackvm_value_float", [c_double], Value ),
+        ( "stackvm_value_size", [c_uint8, c_size_t], Value ),
+    ],
+
+    "stack": [
+        ( "stackvm_stack_get_len", [c_void_p], c_size_t ),
+        ( "stackvm_stack_load", [c_void_p, c_size_t], Value ),
+        ( "stackvm_stack_store_int", [c_void_p, c_size_t, c_int32], None ),
+        ( "stackvm_stack_store_float", [c_void_p, c_size_t, c_double], None ),
+        ( "stackvm_stack_store_address", [c_void_p, c_size_t, c_uint8, c_size_t], None ),
+        ( "stackvm_stack_push_int", [c_void_p, c_int32], None ),
+        ( "stackvm_stack_push_float", [c_void_p, c_double], None ),
+        ( "stackvm_stack_push_address", [c_void_p, c_uint8, c_size_t], None ),
+        ( "stackvm_stack_pop", [c_void_p], Value ),
+        ( "stackvm_stack_load_into", [c_void_p, c_size_t, POINTER(Value)], None ),
+        ( "stackvm_stack_pop_into", [c_void_p, POINTER(Value)], None ),
+        ( "stackvm_stack_push_many", [c_void_p, POINTER(Value), c_size_t], None ),
+        ( "stackvm_stack_pop_many", [c_void_p, POINTER(Value), c_size_t], c_size_t ),
+        ( "stackvm_stack_load_range", [c_void_p, c_size_t, POINTER(Value), c_size_t], c_size_t ),
+    ],
+}
+
+# Functions called on hot paths, bound to module globals so the methods skip
+# the attribute lookup on `lib`/`hot`. Each one is set by the binder of its group
+_sourcemap_find = None
+_stack_load_into = None
+_stack_pop_into = None
+_stack_get_len = None
+_stack_store_address = None
+_stack_push_address = None
+
+def bind_sourcemap():
+    global _sourcemap_find
+
+    _sourcemap_find = lib.stackvm_sourcemap_find
+
+def bind_stack():
+    global _stack_load_into, _stack_pop_into, _stack_get_len, _stack_store_address, _stack_push_address
+
+    _stack_load_into = lib.stackvm_stack_load_into
+    _stack_pop_into = lib.stackvm_stack_pop_into
+    _stack_get_len = hot.stackvm_stack_get_len
+    _stack_store_address = hot.stackvm_stack_store_address
+    _stack_push_address = hot.stackvm_stack_push_address
+
+    _PUSH_TABLE[int(ValueType.INTEGER)] = hot.stackvm_stack_push_int
+    _PUSH_TABLE[int(ValueType.FLOAT)] = hot.stackvm_stack_push_float
+
+    _STORE_TABLE[int(ValueType.INTEGER)] = hot.stackvm_stack_store_int
+    _STORE_TABLE[int(ValueType.FLOAT)] = hot.stackvm_stack_store_float
+
+def bind_registers():
+    for name in ('frame_pointer', 'global_pointer', 'code_pointer', 'stack_pointer'):
+        getter = getattr(hot, 'stackvm_registers_get_' + name)
+        setter = getattr(hot, 'stackvm_registers_set_' + name)
+
+        setattr(Registers, name, property(
+            lambda self, getter = getter: getter(self._vmptr),
+            lambda self, value, setter = setter: setter(self._vmptr, value),
+        ))
+
+GROUP_BINDERS = {
+    "sourcemap": bind_sourcemap,
+    "stack": bind_stack,
+    "registers": bind_registers,
+}
+
+_declared_groups = set()
+_declare_lock = threading.Lock()
+
+def declare_group( group ):
+    if group in _declared_groups:
+        return
+
+    # A group is only marked as declared once all of its functions are bound,
+    # so no other thread can call one of them with the default signature
+    with _declare_lock:
+        if group not in _declared_groups:
+            for name, args, res in DECLS[group]:
+                declare( getattr(lib, name), args, res )
+
+            binder = GROUP_BINDERS.get(group)
+
+            if binder is not None:
+                binder()
+
+            _declared_groups.add(group)
+
+declare_group( "allocator" )
+# Values can be created without any other object, and Value.init is on hot
+# paths, so this small group is bound upfront instead of checked per call
+declare_group( "value" )
+
+global_allocator = lib.stackvm_allocator_init()
+
+# Finalizers still pending at exit run newest first, so the allocator, created
+# before any object, is torn down after everything allocated from it
+own(lib, lib.stackvm_allocator_deinit, global_allocator)
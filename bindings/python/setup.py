@@ -0,0 +1,32 @@
+import os
+import sys
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+# Points to the folder where `zig build` installs the shared library
+lib_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "zig-out", "lib")
+
+# At runtime the shared library is expected next to the extension (the same
+# folder `libstackvm.py` loads it from), so that folder is added to its rpath
+if sys.platform == "darwin":
+    link_args = ["-Wl,-rpath,@loader_path"]
+elif sys.platform == "win32":
+    # Windows has no rpath; Python already searches the extension's own
+    # folder for the DLLs it depends on
+    link_args = []
+else:
+    link_args = ["-Wl,-rpath,$ORIGIN"]
+
+setup(
+    name = "libstackvm",
+    py_modules = ["libstackvm"],
+    ext_modules = cythonize([
+        Extension(
+            "_libstackvm",
+            ["_libstackvm.pyx"],
+            libraries = ["libstackvm"],
+            library_dirs = [lib_dir],
+            extra_link_args = link_args,
+        ),
+    ]),
+)
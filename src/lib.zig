@@ -186,6 +186,22 @@ export fn stackvm_execute(vm: *VirtualMachine) bool {
     return true;
 }
 
+export fn stackvm_execute_n(vm: *VirtualMachine, steps: usize) bool {
+    vm.executeSteps(steps) catch return false;
+
+    return true;
+}
+
+export fn stackvm_execute_until(vm: *VirtualMachine, code_pointer: usize) bool {
+    vm.executeUntil(code_pointer) catch return false;
+
+    return true;
+}
+
+export fn stackvm_is_halted(vm: *VirtualMachine) bool {
+    return vm.halted();
+}
+
 export fn stackvm_get_last_instruction(vm: *VirtualMachine) usize {
     return vm.last_instruction;
 }
@@ -258,7 +274,6 @@ pub const ValueExtern = extern struct {
     }
 
     pub fn toIntern(self: *const ValueExtern) ?Value {
-        std.debug.print("Test kind {}\n", .{self.kind});
         switch (self.kind) {
             .Integer => return Value{ .Integer = self.value.integer },
             .Float => return Value{ .Float = self.value.float },
@@ -359,3 +374,44 @@ export fn stackvm_stack_push_address(vm: *VirtualMachine, kind: ValueType, value
 export fn stackvm_stack_pop(vm: *VirtualMachine) ValueExtern {
     return ValueExtern.initIntern(vm.stack.pop() catch return ValueExtern.initNone());
 }
+
+export fn stackvm_stack_load_into(vm: *VirtualMachine, index: usize, result: *ValueExtern) void {
+    result.* = stackvm_stack_load(vm, index);
+}
+
+export fn stackvm_stack_pop_into(vm: *VirtualMachine, result: *ValueExtern) void {
+    result.* = stackvm_stack_pop(vm);
+}
+
+export fn stackvm_stack_push_many(vm: *VirtualMachine, values: [*]const ValueExtern, len: usize) void {
+    vm.stack.list.ensureCapacity(vm.stack.list.items.len + len) catch return;
+
+    for (values[0..len]) |*value| {
+        const value_intern = value.toIntern() orelse continue;
+
+        _ = vm.stack.push(value_intern) catch return;
+    }
+}
+
+// Values are written in the order they are popped: the top of the stack first
+export fn stackvm_stack_pop_many(vm: *VirtualMachine, values: [*]ValueExtern, len: usize) usize {
+    var i: usize = 0;
+
+    while (i < len) : (i += 1) {
+        values[i] = ValueExtern.initIntern(vm.stack.pop() catch break);
+    }
+
+    return i;
+}
+
+export fn stackvm_stack_load_range(vm: *VirtualMachine, start: usize, values: [*]ValueExtern, len: usize) usize {
+    if (start >= vm.stack.len) return 0;
+
+    const items = vm.stack.list.items[start..std.math.min(start + len, vm.stack.len)];
+
+    for (items) |value, i| {
+        values[i] = ValueExtern.initIntern(value);
+    }
+
+    return items.len;
+}
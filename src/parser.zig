@@ -23,7 +23,8 @@ pub const Parser = struct {
     source: []const u8,
     owned: bool,
     position: TextPosition = TextPosition.initEmpty(),
-    err_message: ?[]u8 = null,
+    // Always points to a static string, so it is never freed
+    err_message: ?[]const u8 = null,
     source_map: SourceMap,
 
     // Parser owns the source
@@ -59,7 +60,6 @@ pub const Parser = struct {
 
     pub fn deinit(self: *Parser) void {
         if (self.owned) self.allocator.free(self.source);
-        if (self.err_message) |msg| self.allocator.free(msg);
         self.source_map.deinit();
     }
 
@@ -470,7 +470,7 @@ pub const Parser = struct {
                 const parameter = self.parseInstructionParameter(inst) catch |err| switch (err) {
                     error.NoMatch => {
                         self.seekTo(backtrack_arg);
-                        self.err_message = try self.allocator.dupe(u8, "No valid instruction parameter.");
+                        self.err_message = "No valid instruction parameter.";
                         return err;
                     },
                     else => return err,
@@ -503,7 +503,7 @@ pub const Parser = struct {
             self.seekTo(backtrack);
 
             // What happens when there is not match at all? Return error
-            self.err_message = try self.allocator.dupe(u8, "No valid instruction or label matched.");
+            self.err_message = "No valid instruction or label matched.";
 
             return error.NoMatch;
         }
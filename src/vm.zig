@@ -44,19 +44,48 @@ pub const VirtualMachine = struct {
         return VirtualMachine.init(allocator, reader);
     }
 
+    pub fn step(self: *VirtualMachine) !void {
+        self.last_instruction = self.bytecode.cursor;
+
+        const instruction = try self.bytecode.readInstruction();
+
+        instruction.execute(self) catch |err| {
+            return err;
+        };
+
+        if (self.registers.err != null) return error.RuntimeError;
+    }
+
+    pub fn halted(self: *VirtualMachine) bool {
+        return self.bytecode.endOfFile() or self.registers.stop;
+    }
+
     pub fn execute(self: *VirtualMachine) !void {
         while (true) {
-            self.last_instruction = self.bytecode.cursor;
+            try self.step();
 
-            const instruction = try self.bytecode.readInstruction();
+            if (self.halted()) break;
+        }
+    }
 
-            instruction.execute(self) catch |err| {
-                return err;
-            };
+    // Executes at most `steps` instructions, stopping earlier if the program ends
+    pub fn executeSteps(self: *VirtualMachine, steps: usize) !void {
+        var i: usize = 0;
+
+        while (i < steps and !self.halted()) : (i += 1) {
+            try self.step();
+        }
+    }
 
-            if (self.registers.err != null) return error.RuntimeError;
+    // Executes until the code pointer reaches `code_pointer` (without running
+    // the instruction there) or the program ends. Unless the VM has already
+    // halted, at least one instruction is executed, so it can be called
+    // repeatedly with the same breakpoint
+    pub fn executeUntil(self: *VirtualMachine, code_pointer: usize) !void {
+        while (!self.halted()) {
+            try self.step();
 
-            if (self.bytecode.endOfFile() or self.registers.stop) break;
+            if (self.bytecode.cursor == code_pointer) break;
         }
     }
 